@@ -0,0 +1 @@
+"""Form 26AS extraction, parsing and reporting, independent of the Streamlit UI"""
@@ -0,0 +1,269 @@
+"""PDF text extraction for Form 26AS, with OCR for scanned pages"""
+import fitz  # PyMuPDF
+import pytesseract
+import tempfile
+import os
+import shlex
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from hashlib import blake2b
+
+# Pages with fewer embedded characters than this are treated as scanned
+MIN_TEXT_CHARS = 50
+
+# OCR rendering: 150 DPI grayscale is enough for typed 26AS scans, and the
+# LSTM engine with a uniform text block skips costly layout auto-detection.
+# Pages are written as uncompressed PGM so neither side pays for PNG zlib
+OCR_DPI = 150
+OCR_IMAGE_FORMAT = 'pgm'
+TESSERACT_CONFIG = '--oem 1 --psm 6'
+
+# OCR results are kept per page, keyed by a digest of the rendered image, so a
+# re-uploaded or corrected PDF only sends its changed scanned pages to tesseract.
+# The text holds PAN/TAN and amounts, so the directory is private to the user
+# and only the most recently used pages are kept
+OCR_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', '26as', 'pages')
+OCR_CACHE_MAX_PAGES = 1000
+
+# PyMuPDF runs every document on one global MuPDF context and is not thread-safe,
+# while Streamlit runs each browser session's script in its own thread. All MuPDF
+# calls (open, classify, render, pixmap release, close, store_shrink) are made
+# under this lock; tesseract runs and cache file I/O happen outside it
+MUPDF_LOCK = threading.Lock()
+
+class PDFPasswordError(Exception):
+    """Raised when the PDF is encrypted and cannot be read without a password"""
+
+# Function to rebuild reading-order lines from PyMuPDF words
+def words_to_text(words, y_tolerance=3):
+    """Group words into lines by vertical position so table rows stay on one line"""
+    lines = []
+    for x0, y0, x1, y1, word, *_ in sorted(words, key=lambda w: (w[1], w[0])):
+        if lines and abs(y0 - lines[-1][0]) <= y_tolerance:
+            lines[-1][1].append((x0, word))
+        else:
+            lines.append([y0, [(x0, word)]])
+    
+    return "\n".join(" ".join(word for _, word in sorted(line_words)) for _, line_words in lines)
+
+# Function to OCR a batch of page images with one tesseract process (runs in a worker thread)
+def ocr_image_batch(image_paths, limit_threads=False):
+    """OCR page images in a single tesseract run, returning (texts, error)"""
+    try:
+        # A .txt input is read by tesseract as a list of images, so the language
+        # data is loaded once per batch; pages come back separated by form feeds
+        list_path = os.path.splitext(image_paths[0])[0] + "-batch.txt"
+        with open(list_path, "w") as list_file:
+            list_file.write("\n".join(image_paths) + "\n")
+        
+        # When the pool runs one tesseract per core, letting each process also
+        # spread over every core with OpenMP oversubscribes the CPU and slows OCR
+        # down. The limit goes into this subprocess's environment only (unless
+        # the user set their own), so a lone batch keeps tesseract's threading.
+        # pytesseract's subprocess options are reused (pipes, hidden window on Windows)
+        popen_args = pytesseract.pytesseract.subprocess_args()
+        if limit_threads:
+            popen_args['env'] = {'OMP_THREAD_LIMIT': '1', **popen_args['env']}
+        result = subprocess.run([pytesseract.pytesseract.tesseract_cmd, list_path, 'stdout',
+                                 *shlex.split(TESSERACT_CONFIG)], **popen_args)
+        if result.returncode:
+            raise pytesseract.TesseractError(result.returncode, result.stderr.decode(errors='replace').strip())
+        texts = result.stdout.decode('utf-8').split("\f")
+        
+        if len(texts) < len(image_paths):
+            raise RuntimeError(f"Tesseract returned {len(texts)} pages, expected {len(image_paths)}")
+        return texts[:len(image_paths)], None
+    except Exception as e:
+        return [""] * len(image_paths), e
+
+# Function to identify the OCR engine and model, looked up once per process
+# (a failed lookup, e.g. tesseract not installed, raises and is not remembered)
+@lru_cache(maxsize=None)
+def ocr_engine_id():
+    """Tesseract version, language data location and config that OCR results depend on"""
+    return f"{pytesseract.get_tesseract_version()}/{os.environ.get('TESSDATA_PREFIX', '')}/{TESSERACT_CONFIG}"
+
+# Function to key a rendered page for the OCR cache
+def page_digest(pixmap, engine_id):
+    """Digest of the page image and the OCR engine it would be read with"""
+    digest = blake2b(digest_size=16)
+    digest.update(f"{pixmap.width}x{pixmap.height}/{engine_id}".encode())
+    digest.update(pixmap.samples)
+    return digest.hexdigest()
+
+# Function to look up a page's cached OCR text
+def load_cached_page_text(digest):
+    """Return the cached OCR text for a page digest, or None if it is not cached"""
+    cache_path = os.path.join(OCR_CACHE_DIR, f"{digest}.txt")
+    try:
+        with open(cache_path, encoding="utf-8") as cache_file:
+            text = cache_file.read()
+        # Mark the page as recently used so pruning keeps it
+        os.utime(cache_path)
+        return text
+    except OSError:
+        return None
+
+# Function to store a page's OCR text (a failed write only costs a cache miss)
+def save_cached_page_text(digest, text):
+    """Write OCR text for a page digest, replacing the file atomically"""
+    cache_path = os.path.join(OCR_CACHE_DIR, f"{digest}.txt")
+    try:
+        os.makedirs(OCR_CACHE_DIR, mode=0o700, exist_ok=True)
+        # mkstemp gives each writer its own owner-only temp file, so sessions
+        # saving the same page never share one
+        fd, tmp_path = tempfile.mkstemp(dir=OCR_CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+                cache_file.write(text)
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except OSError:
+        pass
+
+# Function to keep the OCR cache at OCR_CACHE_MAX_PAGES, dropping the least recently used pages
+def prune_page_cache():
+    """Delete the oldest cached pages beyond OCR_CACHE_MAX_PAGES"""
+    try:
+        with os.scandir(OCR_CACHE_DIR) as entries:
+            cached_pages = [(entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith(".txt")]
+    except OSError:
+        return
+    
+    cached_pages.sort()
+    for _, cache_path in cached_pages[:max(len(cached_pages) - OCR_CACHE_MAX_PAGES, 0)]:
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+
+# Function to OCR the scanned pages of an open document
+def ocr_scanned_pages(doc, page_nums):
+    """Render scanned pages and OCR them in parallel batches, returning ({page_num: text}, errors)"""
+    ocr_texts = {}
+    ocr_errors = []
+    ocr_jobs = []
+    max_workers = min(len(page_nums), os.cpu_count() or 1)
+    batch_size = -(-len(page_nums) // max_workers)
+    
+    try:
+        engine_id = ocr_engine_id()
+    except Exception as e:
+        pages = ", ".join(str(page_num + 1) for page_num in page_nums)
+        return ocr_texts, [f"OCR failed for page(s) {pages}: {str(e)}"]
+    
+    # Batches are OCRed in parallel, one tesseract process per batch; tesseract
+    # runs as a subprocess, so threads scale across cores
+    with tempfile.TemporaryDirectory() as tmp_dir, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # MuPDF rasterizes scanned pages (no poppler needed) and each batch is
+        # submitted as soon as it fills up, so rendering the next batch overlaps
+        # tesseract working on the previous ones. Pages found in the OCR cache
+        # are never written out or batched
+        batch = []
+        image_paths = []
+        digests = []
+        for index, page_num in enumerate(page_nums):
+            pixmap = None
+            try:
+                with MUPDF_LOCK:
+                    pixmap = doc[page_num].get_pixmap(dpi=OCR_DPI, colorspace=fitz.csGRAY)
+                    digest = page_digest(pixmap, engine_id)
+                cached_text = load_cached_page_text(digest)
+                if cached_text is not None:
+                    ocr_texts[page_num] = cached_text
+                else:
+                    image_path = os.path.join(tmp_dir, f"page-{page_num + 1}.{OCR_IMAGE_FORMAT}")
+                    with MUPDF_LOCK:
+                        pixmap.save(image_path)
+                    batch.append(page_num)
+                    image_paths.append(image_path)
+                    digests.append(digest)
+            except Exception as e:
+                ocr_errors.append(f"OCR failed for page {page_num + 1}: {str(e)}")
+            finally:
+                # Dropping the last reference frees the pixmap on the shared
+                # MuPDF context, so it must happen under the lock as well
+                with MUPDF_LOCK:
+                    pixmap = None
+            
+            if batch and (len(batch) == batch_size or index == len(page_nums) - 1):
+                ocr_jobs.append((batch, digests, executor.submit(ocr_image_batch, image_paths, max_workers > 1)))
+                batch = []
+                image_paths = []
+                digests = []
+        
+        # Release MuPDF's cached fonts and resources before waiting on OCR
+        with MUPDF_LOCK:
+            fitz.TOOLS.store_shrink(100)
+        
+        for batch, digests, job in ocr_jobs:
+            texts, error = job.result()
+            if error:
+                pages = ", ".join(str(page_num + 1) for page_num in batch)
+                ocr_errors.append(f"OCR failed for page(s) {pages}: {str(error)}")
+            else:
+                for digest, text in zip(digests, texts):
+                    save_cached_page_text(digest, text)
+            ocr_texts.update(zip(batch, texts))
+    
+    if ocr_jobs:
+        prune_page_cache()
+    
+    return ocr_texts, ocr_errors
+
+# Function to read the text layer of every page and find the scanned ones (call under MUPDF_LOCK)
+def classify_pages(doc):
+    """Return (page_texts, ocr_pages): embedded text per page and the page numbers that need OCR"""
+    page_texts = []
+    ocr_pages = []
+    
+    # Classification pass: embedded text length and image presence per page.
+    # A page whose resources (including form XObjects) reference no fonts
+    # cannot carry text, so its content stream is never interpreted for it.
+    # Images are detected with get_image_info, which unlike get_images also
+    # sees scans drawn as inline images (BI ... ID ... EI)
+    for page in doc:
+        text = words_to_text(page.get_text("words")) if page.get_fonts() else ""
+        
+        if len(text.strip()) < MIN_TEXT_CHARS and page.get_image_info():
+            ocr_pages.append(page.number)
+        
+        page_texts.append(text)
+    
+    return page_texts, ocr_pages
+
+# Function to extract text from PDF bytes (raises PDFPasswordError for encrypted PDFs)
+def extract_text_from_pdf(pdf_bytes):
+    """Extract text from PDF, sending scanned pages straight to OCR; returns (text, ocr_pages, ocr_errors)"""
+    ocr_errors = []
+    
+    # Opened straight from memory; no temp copy of the upload is written
+    try:
+        with MUPDF_LOCK:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    except Exception as e:
+        if "password" in str(e).lower():
+            raise PDFPasswordError(str(e)) from e
+        raise
+    
+    try:
+        with MUPDF_LOCK:
+            if doc.needs_pass:
+                raise PDFPasswordError("The PDF is password-protected")
+            page_texts, ocr_pages = classify_pages(doc)
+        
+        # Born-digital statements (the common case) have a text layer on every
+        # page and finish here, without creating any OCR temp files or workers
+        if ocr_pages:
+            ocr_texts, ocr_errors = ocr_scanned_pages(doc, ocr_pages)
+            for page_num, text in ocr_texts.items():
+                page_texts[page_num] = text
+    finally:
+        with MUPDF_LOCK:
+            doc.close()
+    
+    return "\n".join(page_texts) + "\n", ocr_pages, ocr_errors
@@ -0,0 +1,101 @@
+"""Section-wise TDS parsing of Form 26AS text"""
+import pandas as pd
+import re
+import sys
+
+# Known section spellings (after upper-casing) and their standard form
+SECTION_ALIASES = {
+    # 1941(a) -> 194I(a), 1941(b) -> 194I(b) (OCR reads I as 1)
+    '1941(A)': '194I(a)',
+    '1941(B)': '194I(b)',
+    '194I(A)': '194I(a)',
+    '194I(B)': '194I(b)',
+    
+    # Handle without parentheses: 194Ia -> 194I(a), 194Ib -> 194I(b)
+    '194IA': '194I(a)',
+    '194IB': '194I(b)',
+    
+    # Handle 194J variations
+    '194J(A)': '194J(a)',
+    '194J(B)': '194J(b)',
+    '194JA': '194J(a)',
+    '194JB': '194J(b)',
+}
+
+# 194LC(2)(I), (IA), (IB), (IC) -> lower-case clause
+SECTION_194LC_RE = re.compile(r'194LC\(2\)\((I[ABC]?)\)')
+
+# COMPREHENSIVE REGEX PATTERN for ALL TDS sections
+# Matches: 192, 192A, 193, 194, 194A through 194S, 195, 196A-196DA, 206CA-206CQ, etc.
+# Scanned over the whole text at once: PART-I / PART-II headings toggle the TDS
+# section, rows match at line starts and never span lines, and the rest group
+# captures the remainder of the row, where the amounts are
+TDS_SCAN_RE = re.compile(r'(?P<part>PART[- ]?(?P<part_no>II?)\b)'
+                         r'|^[^\S\n]*(?P<sr>\d+)[^\S\n]+(?P<section>'
+                         r'192A?|193|194[A-Z]*(?:\([a-z]\))?|1941?\([ab]\)|'
+                         r'195|196[A-Z]*|'
+                         r'206C[A-Z]'
+                         r')[^\S\n]+(?P<rest>.*)', re.IGNORECASE | re.MULTILINE)
+
+# Amounts with two decimals (including potential negatives). Commas are matched
+# loosely on purpose: 26AS uses Indian digit grouping (12,34,567.00), which a
+# strict thousands pattern would cut down to its last groups
+AMOUNT_RE = re.compile(r'(-?[\d,]+\.\d{2})')
+
+# Function to normalize section names
+def normalize_section(section_raw):
+    """Normalize section names to standard format"""
+    section = section_raw.upper().strip()
+    
+    alias = SECTION_ALIASES.get(section)
+    if alias:
+        return sys.intern(alias)
+    
+    return sys.intern(SECTION_194LC_RE.sub(lambda m: f"194LC(2)({m.group(1).lower()})", section))
+
+# Function to parse TDS data from Form 26AS - SECTION-WISE ONLY
+def parse_form_26as_sectionwise(text):
+    """Parse Form 26AS and return ONLY the section-wise TDS aggregate, ignoring negative values"""
+    
+    rows = []
+    in_tds_section = False
+    
+    for match in TDS_SCAN_RE.finditer(text):
+        # Track whether we're in PART-I (TDS section); PART-II ends it, and nothing
+        # after it feeds the section summary, so stop scanning there
+        if match.group('part'):
+            is_part_one = match.group('part_no').upper() == 'I'
+            if in_tds_section and not is_part_one:
+                break
+            in_tds_section = is_part_one
+            continue
+        
+        if not in_tds_section:
+            continue
+        
+        section = normalize_section(match.group('section'))
+        
+        # Extract all amounts from the rest of the row
+        amounts = AMOUNT_RE.findall(match.group('rest'))
+        
+        if len(amounts) >= 3:
+            # Last 3 amounts are: Amount Paid/Credited, Tax Deducted, TDS Deposited
+            rows.append((section, amounts[-3], amounts[-1]))
+    
+    # Convert the raw amount strings in one vectorized pass; explicit float64 columns
+    # keep the sums on NumPy's reduction kernels even when no rows matched
+    df = pd.DataFrame(rows, columns=['section', 'receipts', 'tds'])
+    for column in ('receipts', 'tds'):
+        df[column] = pd.to_numeric(df[column].str.replace(',', '', regex=False), errors='coerce').astype('float64')
+    
+    # RULE 1: Ignore negative figures (unparseable amounts are NaN and dropped too)
+    df = df[(df['receipts'] >= 0) & (df['tds'] >= 0)]
+    
+    # Aggregate per section in one vectorized pass
+    section_summary = df.groupby('section').agg(
+        total_receipts=('receipts', 'sum'),
+        total_tds=('tds', 'sum'),
+        transaction_count=('receipts', 'size')
+    )
+    
+    return section_summary
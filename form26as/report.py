@@ -0,0 +1,107 @@
+"""Section-wise summary table and Excel report"""
+import pandas as pd
+import sys
+from io import BytesIO
+from types import MappingProxyType
+
+# Comprehensive section mapping from Form 26AS (read-only, keys interned so
+# lookups with sections from parse.normalize_section compare by identity)
+SECTION_DESCRIPTIONS = MappingProxyType({sys.intern(section): description for section, description in {
+    '192': 'Salary',
+    '192A': 'TDS on PF withdrawal',
+    '193': 'Interest on Securities',
+    '194': 'Dividends',
+    '194A': 'Interest other than Interest on securities',
+    '194B': 'Winning from lottery or crossword puzzle',
+    '194BA': 'Winnings from online games',
+    '194BB': 'Winning from horse race',
+    '194C': 'Payments to contractors and sub-contractors',
+    '194D': 'Insurance commission',
+    '194DA': 'Payment in respect of life insurance policy',
+    '194E': 'Payments to non-resident sportsmen or sports associations',
+    '194EE': 'Payments in respect of deposits under National Savings Scheme',
+    '194F': 'Payments on account of repurchase of units by Mutual Fund',
+    '194G': 'Commission, price, etc. on sale of lottery tickets',
+    '194H': 'Commission or brokerage',
+    '194I(a)': 'Rent on hiring of plant and machinery',
+    '194I(b)': 'Rent on other than plant and machinery',
+    '194IA': 'TDS on Sale of immovable property',
+    '194IB': 'Payment of rent by certain individuals or Hindu undivided family',
+    '194IC': 'Payment under specified agreement',
+    '194J(a)': 'Fees for technical services',
+    '194J(b)': 'Fees for professional services or royalty',
+    '194JA': 'Fees for technical services',
+    '194JB': 'Fees for professional services or royalty',
+    '194K': 'Income payable to a resident in respect of units',
+    '194LA': 'Payment of compensation on acquisition of immovable property',
+    '194LB': 'Income by way of Interest from Infrastructure Debt fund',
+    '194LC': 'Income from infrastructure debt fund',
+    '194LBA': 'Certain income from units of a business trust',
+    '194LBB': 'Income in respect of units of investment fund',
+    '194LBC': 'Income in respect of investment in securitization trust',
+    '194LD': 'TDS on interest on bonds / government securities',
+    '194M': 'Payment of certain sums by certain individuals or HUF',
+    '194N': 'Payment of certain amounts in cash',
+    '194O': 'Payment of certain sums by e-commerce operator',
+    '194P': 'Deduction of tax in case of specified senior citizen',
+    '194Q': 'Deduction of tax on payment for purchase of goods',
+    '194R': 'Benefits or perquisites of business or profession',
+    '194S': 'Payment for transfer of virtual digital asset',
+    '195': 'Other sums payable to a non-resident',
+    '196A': 'Income in respect of units of non-residents',
+    '196B': 'Payments in respect of units to an offshore fund',
+    '196C': 'Income from foreign currency bonds or shares',
+    '196D': 'Income of foreign institutional investors from securities',
+    '196DA': 'Income of specified fund from securities'
+}.items()})
+
+# Function to build the section-wise summary table shown on screen and in Excel
+def build_section_table(section_summary):
+    """Number and describe the per-section aggregate from parse_form_26as_sectionwise"""
+    df_section = (section_summary
+                  .rename_axis('TDS Section')
+                  .reset_index()
+                  .rename(columns={
+                      'total_receipts': 'Total Receipts',
+                      'total_tds': 'Total TDS Deposited',
+                      'transaction_count': 'Transaction Count'
+                  }))
+    df_section.insert(0, 'Sr. No.', range(1, len(df_section) + 1))
+    
+    # Get description from mapping
+    df_section.insert(2, 'Description',
+                      df_section['TDS Section'].map(SECTION_DESCRIPTIONS).fillna('Description not available'))
+    
+    return df_section
+
+# Function to create Excel with ONLY section-wise summary
+def create_excel_report(df_section):
+    """Create Excel file with ONLY Section-wise Summary"""
+    output = BytesIO()
+    amount_columns = ['Total Receipts', 'Total TDS Deposited']
+    
+    # Auto-adjust column widths from the DataFrame instead of walking every cell;
+    # amount columns are measured as displayed, with digit grouping
+    widths = {}
+    for column in df_section.columns:
+        if column in amount_columns:
+            values = df_section[column].map('{:,.2f}'.format)
+        else:
+            values = df_section[column].astype(str)
+        widths[column] = min(max(values.str.len().max(), len(column)) + 2, 60)
+    
+    # xlsxwriter streams the sheet out instead of building an openpyxl workbook DOM.
+    # constant_memory is left off: pandas writes cells column by column, and that
+    # mode silently drops every row but the last for all columns but the last
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df_section.to_excel(writer, sheet_name='Section-wise Summary', index=False)
+        
+        # Format the sheet: amounts stay numeric cells with a native number format
+        amount_format = writer.book.add_format({'num_format': '#,##0.00'})
+        section_sheet = writer.sheets['Section-wise Summary']
+        for col_idx, column in enumerate(df_section.columns):
+            cell_format = amount_format if column in amount_columns else None
+            section_sheet.set_column(col_idx, col_idx, widths[column], cell_format)
+    
+    output.seek(0)
+    return output